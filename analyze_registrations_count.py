@@ -4,13 +4,100 @@ Analyzes product registrations from a sales/transaction CSV export.
 """
 import csv
 import re
+import sys
 from utils import (
     select_file_interactive,
     select_column_interactive,
-    read_csv_with_fallback_encoding,
+    read_csv_headers,
+    iter_csv_rows,
     create_base_argparser
 )
 
+# Regex to match: "Product Name (Amount: XX.XX USD, Quantity: N, ...)"
+# Compiled once at import rather than on every analyze_csv call. It is run
+# over whole cells with finditer, one product per line: ^ anchors each match
+# at a line start (skipping "Total:" / "Transaction ID:" lines), [^\S\n] is
+# whitespace that stays on the line, and the lookahead requires the closing
+# parenthesis on the same line. Everything after "(Amount:" uses [^)]
+# classes, so matching never backtracks past that parenthesis.
+PRODUCT_PATTERN = re.compile(
+    r'^(?![^\S\n]*(?:Total:|Transaction ID:))(.*?)[^\S\n]*\(Amount:(?=[^)\n]*\))'
+    r'\s*([\d.]+)[^)]*?,\s*Quantity:\s*(\d+)(?:,\s*Registration Type:\s*([^,)]+))?[^)]*\)',
+    re.MULTILINE
+)
+
+
+def parse_product_line(line):
+    """
+    Parses a single product line.
+    
+    Args:
+        line: One line of a products cell
+    
+    Returns:
+        Tuple of (name, price, quantity, registration_type), or None if the
+        line doesn't look like a product
+    """
+    match = PRODUCT_PATTERN.search(line)
+    if not match:
+        return None
+
+    name = match.group(1).strip()
+    try:
+        price_val = float(match.group(2))
+        # Treat 20.00 as 20
+        if price_val.is_integer():
+            price_val = int(price_val)
+    except ValueError:
+        price_val = 0
+
+    quantity = int(match.group(3))
+    reg_type = match.group(4).strip() if match.group(4) else "Unspecified"
+    return name, price_val, quantity, reg_type
+
+
+def tally_products(rows, col_idx):
+    """
+    Counts product lines in one column across all rows.
+    This is the hot loop of the analysis; it only tallies matched text and
+    leaves parsing to the caller, once per distinct product.
+    
+    Args:
+        rows: Iterable of row lists (blank rows are ignored)
+        col_idx: Index of the products column
+    
+    Returns:
+        Tuple of (total_rows, rows_without_matches, product_counts), where
+        product_counts maps each matched product line to its occurrences
+    """
+    total_rows = 0
+    rows_without_matches = 0
+    product_counts = {}
+    finditer = PRODUCT_PATTERN.finditer
+
+    for row in rows:
+        if not row:
+            continue
+        total_rows += 1
+        cell_value = row[col_idx] if col_idx < len(row) else ''
+        if not cell_value:
+            continue
+
+        # Several products can share a cell, one per line. Each match is
+        # tallied by its text.
+        found_match = False
+        if "(Amount:" in cell_value:
+            for match in finditer(cell_value):
+                found_match = True
+                product = match.group(0)
+                product_counts[product] = product_counts.get(product, 0) + 1
+
+        # Track rows with non-empty content but no pattern matches
+        if cell_value.strip() and not found_match:
+            rows_without_matches += 1
+
+    return total_rows, rows_without_matches, product_counts
+
 
 def analyze_csv(filepath, column_name=None):
     """
@@ -23,7 +110,7 @@ def analyze_csv(filepath, column_name=None):
     print(f"\nAnalyzing {filepath}...")
     
     try:
-        headers, rows = read_csv_with_fallback_encoding(filepath, use_dictreader=True)
+        headers, encoding = read_csv_headers(filepath)
     except FileNotFoundError:
         print(f"Error: File '{filepath}' not found.")
         return
@@ -40,86 +127,64 @@ def analyze_csv(filepath, column_name=None):
 
     # Column Selection
     column_name = select_column_interactive(headers, column_name)
+    col_idx = headers.index(column_name)
     print(f"Analyzing column: '{column_name}'")
 
-    total_rows = 0
     total_registrations = 0
     breakdown = {}
-    rows_without_matches = 0
-    
-    # Regex to match: "Product Name (Amount: XX.XX USD, Quantity: N, ...)"
-    product_pattern = re.compile(
-        r'(.*?)\s*\(Amount:\s*([\d\.]+).*?, Quantity:\s*(\d+)(?:, Registration Type:\s*([^,)]+))?.*?\)'
-    )
 
     price_counts = {0: 0, 20: 0, 25: 0, 30: 0, 35: 0, 40: 0, 50: 0}
     other_price_counts = {}
 
-    for row in rows:
-        total_rows += 1
-        cell_value = row.get(column_name, '')
-        if not cell_value:
+    try:
+        total_rows, rows_without_matches, product_counts = tally_products(
+            iter_csv_rows(filepath, encoding), col_idx
+        )
+    except csv.Error as e:
+        print(f"Error: CSV parsing failed - {e}")
+        return
+
+    # One pass over the distinct products instead of three dict updates per line
+    for product, occurrences in product_counts.items():
+        name, price_val, quantity, reg_type = parse_product_line(product)
+        # Only count items that look like Registrations
+        if "Registration" not in name:
             continue
-        
-        # Split by newlines as sometimes multiple products are in one cell
-        lines = cell_value.split('\n')
-        found_match = False
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith("Total:") or line.startswith("Transaction ID:"):
-                continue
-                
-            match = product_pattern.search(line)
-            if match:
-                found_match = True
-                name = match.group(1).strip()
-                try:
-                    price_val = float(match.group(2))
-                    # Treat 20.00 as 20
-                    if price_val.is_integer():
-                        price_val = int(price_val)
-                except ValueError:
-                    price_val = 0
-
-                quantity = int(match.group(3))
-                reg_type = match.group(4).strip() if match.group(4) else "Unspecified"
-                
-                # Only count items that look like Registrations
-                if "Registration" in name:
-                    total_registrations += quantity
-                    key = f"{name} - {reg_type}"
-                    breakdown[key] = breakdown.get(key, 0) + quantity
-
-                    # Track by price
-                    if price_val in price_counts:
-                        price_counts[price_val] += quantity
-                    else:
-                        other_price_counts[price_val] = other_price_counts.get(price_val, 0) + quantity
-        
-        # Track rows with non-empty content but no pattern matches
-        if cell_value.strip() and not found_match:
-            rows_without_matches += 1
+        quantity *= occurrences
+        total_registrations += quantity
+        key = f"{name} - {reg_type}"
+        breakdown[key] = breakdown.get(key, 0) + quantity
+
+        # Track by price
+        if price_val in price_counts:
+            price_counts[price_val] += quantity
+        else:
+            other_price_counts[price_val] = other_price_counts.get(price_val, 0) + quantity
 
-    print(f"\nTotal rows processed: {total_rows}")
-    print(f"Total Registrations Counted: {total_registrations}")
+    # Build the report and write it in one call rather than one print per line
+    report = [
+        f"\nTotal rows processed: {total_rows}",
+        f"Total Registrations Counted: {total_registrations}",
+    ]
     
     if rows_without_matches > 0:
-        print(f"Rows with content but no pattern matches: {rows_without_matches}")
+        report.append(f"Rows with content but no pattern matches: {rows_without_matches}")
     
-    print("\nRegistrations by Price Point:")
+    report.append("\nRegistrations by Price Point:")
     for price in [0, 20, 25, 30, 35, 40, 50]:
         count = price_counts.get(price, 0)
-        print(f"  ${price}: {count}")
+        report.append(f"  ${price}: {count}")
     
     if other_price_counts:
-        print("  Other Prices:")
+        report.append("  Other Prices:")
         for price, count in sorted(other_price_counts.items()):
-            print(f"    ${price}: {count}")
+            report.append(f"    ${price}: {count}")
 
-    print("\nBreakdown by Type:")
+    report.append("\nBreakdown by Type:")
     for key, count in sorted(breakdown.items(), key=lambda x: x[1], reverse=True):
-        print(f"  {key}: {count}")
+        report.append(f"  {key}: {count}")
+
+    sys.stdout.write("\n".join(report) + "\n")
 
 
 def main():
@@ -2,18 +2,256 @@
 """
 Groups similar text entries in a column to identify typos, variations, or duplicates.
 """
+import bisect
 import csv
 import difflib
-from collections import Counter
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from utils import (
     select_file_interactive,
     select_column_interactive,
-    read_csv_with_fallback_encoding,
+    read_csv_headers,
+    iter_csv_rows,
     create_base_argparser
 )
 
 
-def analyze_similarity(filepath, column_name=None, cutoff=0.6):
+SIMILARITY_METRICS = ('ratio', 'levenshtein')
+
+# Below this many unique values, starting worker processes costs more than
+# the comparisons themselves
+PARALLEL_MIN_VALUES = 1000
+
+# Lengths are whole numbers, so this slack on the float length bounds only
+# ever admits exact-tie lengths that rounding would otherwise cut off
+LENGTH_BAND_SLACK = 1e-9
+
+
+def _char_masks(text):
+    """
+    Maps each character of text to a bitmask of the positions it occurs at.
+    """
+    masks = {}
+    for pos, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | (1 << pos)
+    return masks
+
+
+def _bitparallel_distance(masks, length, other):
+    """
+    Levenshtein distance between a string (given by its _char_masks and
+    length) and other, using the bit-parallel algorithm of Myers and Hyyrö.
+    One column of the edit-distance matrix is kept as bit vectors in Python
+    ints, so each character of other costs a few integer operations instead
+    of a loop over the first string.
+    """
+    if not length:
+        return len(other)
+
+    full = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+    vp = full
+    vn = 0
+    distance = length
+
+    for char in other:
+        eq = masks.get(char, 0)
+        x = eq | vn
+        d0 = ((((x & vp) + vp) & full) ^ vp) | x
+        hp = vn | (~(d0 | vp) & full)
+        hn = vp & d0
+        if hp & last_bit:
+            distance += 1
+        elif hn & last_bit:
+            distance -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = hn | (~(d0 | hp) & full)
+        vn = hp & d0
+
+    return distance
+
+
+def levenshtein_distance(a, b):
+    """
+    Computes the Levenshtein (edit) distance between two strings.
+    """
+    return _bitparallel_distance(_char_masks(a), len(a), b)
+
+
+def levenshtein_similarity(a, b):
+    """
+    Normalized Levenshtein similarity: 1 - distance / max(len(a), len(b)).
+    """
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return 1 - levenshtein_distance(a, b) / longest
+
+
+def _build_scorer(values, cutoff, metric):
+    """
+    Prepares the pieces used to compare values under the given metric.
+    
+    Returns:
+        Tuple of (candidates, is_similar): candidates(i) lists the indices
+        j > i inside value i's length band, and is_similar(i, j) scores a pair
+    """
+    if metric == 'levenshtein':
+        # The distance is at least the length difference, so only lengths
+        # within [len * cutoff, len / cutoff] can reach the cutoff. The band
+        # is widened by LENGTH_BAND_SLACK so float rounding at an exact tie
+        # can't drop a length; is_similar makes the final call.
+        def length_band(length):
+            if cutoff <= 0:
+                return 0, float('inf')
+            return length * cutoff - LENGTH_BAND_SLACK, length / cutoff + LENGTH_BAND_SLACK
+
+        # Character masks depend only on the root, so build them once each
+        masks = [_char_masks(val) for val in values]
+
+        def is_similar(i, j):
+            longest = max(len(values[i]), len(values[j]))
+            if not longest:
+                # Two empty strings are identical
+                return True
+            distance = _bitparallel_distance(masks[i], len(values[i]), values[j])
+            return 1 - distance / longest >= cutoff
+    else:
+        # Length-based optimization: skip if lengths are too different
+        def length_band(length):
+            max_allowed_diff = length * (1 - cutoff) + 2
+            return length - max_allowed_diff, length + max_allowed_diff
+
+        # SequenceMatcher caches its analysis of the second sequence, so keep
+        # one matcher per value (as the candidate side) and only swap in the root
+        matchers = [difflib.SequenceMatcher(None, b=val) for val in values]
+
+        def is_similar(i, j):
+            matcher = matchers[j]
+            matcher.set_seq1(values[i])
+            # Cheap upper bounds first (length only, then character counts);
+            # ratio() runs the full matching algorithm
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                return False
+            return matcher.ratio() >= cutoff
+
+    # Index positions ordered by length, so each root only visits candidates
+    # inside its allowed length band
+    by_length = sorted(range(len(values)), key=lambda k: len(values[k]))
+    sorted_lengths = [len(values[k]) for k in by_length]
+
+    def candidates(i):
+        low, high = length_band(len(values[i]))
+        band_start = bisect.bisect_left(sorted_lengths, low)
+        band_end = bisect.bisect_right(sorted_lengths, high)
+        return [j for j in by_length[band_start:band_end] if j > i]
+
+    return candidates, is_similar
+
+
+def _find(parent, x):
+    """
+    Union-find lookup with path halving: returns the root of x's cluster.
+    """
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _link_roots(roots, candidates, is_similar, parent):
+    """
+    Merges each root with its similar candidates in the union-find parent
+    list. Pairs already in the same cluster are not scored, since the result
+    couldn't change anything.
+    
+    Returns:
+        List of the (i, j) pairs that joined two clusters
+    """
+    links = []
+    for i in roots:
+        for j in candidates(i):
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i == root_j:
+                continue
+            if is_similar(i, j):
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+                links.append((i, j))
+    return links
+
+
+# Scorer for the current worker process, set up once by _init_pair_worker
+_worker_scorer = None
+_worker_size = 0
+
+
+def _init_pair_worker(values, cutoff, metric):
+    """
+    Builds the scorer once per worker process (ProcessPoolExecutor initializer).
+    """
+    global _worker_scorer, _worker_size
+    _worker_scorer = _build_scorer(values, cutoff, metric)
+    _worker_size = len(values)
+
+
+def _link_chunk(roots):
+    """
+    Clusters the given root indices with a union-find local to this chunk
+    (worker side). Only the pairs that joined two clusters are returned, at
+    most one per value, so the parent can rebuild the same connectivity.
+    """
+    candidates, is_similar = _worker_scorer
+    return _link_roots(roots, candidates, is_similar, list(range(_worker_size)))
+
+
+def cluster_similar_values(values, cutoff, metric='ratio', jobs=1):
+    """
+    Clusters values whose similarity meets the cutoff.
+    Similarity is treated as transitive: if a~b and b~c, all three share a
+    cluster (union-find), independent of the order values are visited in.
+    
+    Args:
+        values: List of strings to compare (already case-normalized)
+        cutoff: Similarity threshold (0.0-1.0)
+        metric: 'ratio' for difflib's SequenceMatcher.ratio(), or
+                'levenshtein' for normalized edit-distance similarity
+        jobs: Number of worker processes to score pairs with; only used
+              once there are at least PARALLEL_MIN_VALUES values
+    
+    Returns:
+        List of clusters, each a sorted list of indices into values
+    """
+    parent = list(range(len(values)))
+
+    if jobs > 1 and len(values) >= PARALLEL_MIN_VALUES:
+        # Scoring is pure Python and holds the GIL, so fan out to processes.
+        # Each task takes an interleaved slice of roots, since early roots
+        # have more candidates after them than late ones.
+        step = jobs * 4
+        chunks = [range(start, len(values), step) for start in range(step)]
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_pair_worker,
+            initargs=(values, cutoff, metric)
+        ) as pool:
+            for links in pool.map(_link_chunk, chunks):
+                for i, j in links:
+                    root_i, root_j = _find(parent, i), _find(parent, j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+    else:
+        candidates, is_similar = _build_scorer(values, cutoff, metric)
+        _link_roots(range(len(values)), candidates, is_similar, parent)
+
+    clusters = defaultdict(list)
+    for i in range(len(values)):
+        clusters[_find(parent, i)].append(i)
+    return list(clusters.values())
+
+
+def analyze_similarity(filepath, column_name=None, cutoff=0.6, metric='ratio', jobs=1):
     """
     Analyzes text similarity in a CSV column to find potential duplicates/typos.
     
@@ -21,11 +259,13 @@ def analyze_similarity(filepath, column_name=None, cutoff=0.6):
         filepath: Path to the CSV file
         column_name: Optional column name to analyze
         cutoff: Similarity threshold (0.0-1.0), default 0.6
+        metric: Similarity measure, one of SIMILARITY_METRICS (default 'ratio')
+        jobs: Worker processes for the similarity comparison, default 1
     """
     print(f"\nAnalyzing {filepath}...")
     
     try:
-        headers, rows = read_csv_with_fallback_encoding(filepath, use_dictreader=True)
+        headers, encoding = read_csv_headers(filepath)
     except FileNotFoundError:
         print(f"Error: File '{filepath}' not found.")
         return
@@ -42,15 +282,23 @@ def analyze_similarity(filepath, column_name=None, cutoff=0.6):
 
     # Column Selection
     column_name = select_column_interactive(headers, column_name)
+    col_idx = headers.index(column_name)
     print(f"Analyzing column: '{column_name}'")
 
+    total_rows = 0
     values = []
-    for row in rows:
-        val = row.get(column_name, '')
-        if val and val.strip():
-            values.append(val.strip())
-    
-    total_rows = len(rows)
+    try:
+        for row in iter_csv_rows(filepath, encoding):
+            if not row:
+                continue
+            total_rows += 1
+            val = row[col_idx] if col_idx < len(row) else ''
+            if val and val.strip():
+                values.append(val.strip())
+    except csv.Error as e:
+        print(f"Error: CSV parsing failed - {e}")
+        return
+
     non_empty_count = len(values)
     
     print(f"Total Rows: {total_rows}")
@@ -65,39 +313,15 @@ def analyze_similarity(filepath, column_name=None, cutoff=0.6):
 
     # Similarity Grouping
     unique_vals = sorted(counts.keys())
-    
-    groups = []
-    visited = set()
+    lowered = [val.lower() for val in unique_vals]
 
-    print(f"\n--- Similarity Grouping (cutoff={cutoff}) ---")
+    print(f"\n--- Similarity Grouping ({metric}, cutoff={cutoff}) ---")
     print("Grouping values that look similar (potential typos or variations)...")
 
-    for i in range(len(unique_vals)):
-        if unique_vals[i] in visited:
-            continue
-        
-        root = unique_vals[i]
-        current_group = [(root, counts[root])]
-        visited.add(root)
-        
-        for j in range(i + 1, len(unique_vals)):
-            candidate = unique_vals[j]
-            if candidate in visited:
-                continue
-            
-            # Length-based optimization: skip if lengths are too different
-            len_diff = abs(len(root) - len(candidate))
-            max_allowed_diff = len(root) * (1 - cutoff) + 2
-            if len_diff > max_allowed_diff:
-                continue
-            
-            ratio = difflib.SequenceMatcher(None, root.lower(), candidate.lower()).ratio()
-            if ratio >= cutoff:
-                current_group.append((candidate, counts[candidate]))
-                visited.add(candidate)
-        
-        if len(current_group) > 1:
-            groups.append(current_group)
+    groups = []
+    for cluster in cluster_similar_values(lowered, cutoff, metric, jobs):
+        if len(cluster) > 1:
+            groups.append([(unique_vals[i], counts[unique_vals[i]]) for i in cluster])
 
     # Sort groups by total count
     groups.sort(key=lambda g: sum(x[1] for x in g), reverse=True)
@@ -105,13 +329,16 @@ def analyze_similarity(filepath, column_name=None, cutoff=0.6):
     if not groups:
         print("No similar groups found.")
     else:
+        # Write all groups in one call rather than one print per member
+        lines = []
         for grp in groups:
-            print("\nGroup:")
+            lines.append("\nGroup:")
             total_in_grp = 0
             for val, count in grp:
-                print(f"  - '{val}' (Count: {count})")
+                lines.append(f"  - '{val}' (Count: {count})")
                 total_in_grp += count
-            print(f"  [Total in group: {total_in_grp}]")
+            lines.append(f"  [Total in group: {total_in_grp}]")
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -124,6 +351,18 @@ def main():
         default=0.8,
         help='Similarity threshold 0.0-1.0 (default: 0.8, higher = stricter matching)'
     )
+    parser.add_argument(
+        '--metric',
+        choices=SIMILARITY_METRICS,
+        default='ratio',
+        help="Similarity measure: difflib 'ratio' or normalized 'levenshtein' edit distance (default: ratio)"
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Worker processes for comparing large columns (default: 1, no parallelism)'
+    )
     args = parser.parse_args()
     
     # Get file - from args or interactive
@@ -133,7 +372,7 @@ def main():
         if not target_file:
             return
     
-    analyze_similarity(target_file, args.column, args.cutoff)
+    analyze_similarity(target_file, args.column, args.cutoff, args.metric, args.jobs)
 
 
 if __name__ == "__main__":
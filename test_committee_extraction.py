@@ -0,0 +1,56 @@
+import unittest
+
+from ypaa_comitee_analyzer import count_registrations, extract_groups
+
+class TestCommitteeExtraction(unittest.TestCase):
+    def test_extract_groups(self):
+        test_cases = [
+            # Blank and "no" answers
+            ("", ("Not Specified / Not a YPAA",)),
+            ("  ", ("Not Specified / Not a YPAA",)),
+            ("Not yet", ("Not Specified / Not a YPAA",)),
+
+            # "Yes" without a group
+            ("Yes!", ("Yes, Unspecified Group",)),
+            ("yes i am on one", ("Yes, Unspecified Group",)),
+
+            # Names, normalization and typos
+            ("WACYPAA", ("WACYPAA",)),
+            ("saltypaa", ("UCYPAA",)),
+            ("BURQUYPAA", ("BURQYPAA",)),
+            ("wac", ("WACYPAA",)),
+            ("swac", ("SWACYPAA",)),
+            ("ßwacypaa", ("WACYPAA",)),
+            ("weißypaa", ("Weißypaa",)),
+
+            # Several groups in one answer
+            ("SCYPAA / WACYPAA", ("SCYPAA", "WACYPAA")),
+            ("I'm on RENVY and BACY", ("RENVYPAA", "BACYPAA")),
+            ("WACYPAA/WACYPAA", ("WACYPAA",)),
+
+            # Host/advisory roles and free text
+            ("host committee", ("Host / Advisory (Unspecified YPAA)",)),
+            ("just an AA member", ("Just An Aa Member",)),
+        ]
+
+        for value, expected in test_cases:
+            with self.subTest(value=value):
+                self.assertEqual(extract_groups(value), expected)
+
+class TestRegistrationCount(unittest.TestCase):
+    def test_count_registrations(self):
+        cell = (
+            "WACYPAA 27 Registration (Amount: 27.00 USD, Quantity: 2, Registration Type: Early Bird)\n"
+            "T-Shirt (Amount: 20.00 USD, Quantity: 3)\n"
+            "Late Registration (Amount: 50.00 USD, Quantity: 1)\n"
+            "Total: Registration (Amount: 97.00 USD, Quantity: 6)\n"
+            "Transaction ID: 12345"
+        )
+        self.assertEqual(count_registrations(cell), 3)
+
+    def test_no_registrations(self):
+        self.assertEqual(count_registrations(""), 0)
+        self.assertEqual(count_registrations("T-Shirt (Amount: 20.00 USD, Quantity: 3)"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,10 @@
-import re
 import unittest
 
+from analyze_registrations_count import PRODUCT_PATTERN, tally_products
+
 class TestRegistrationParsing(unittest.TestCase):
     def setUp(self):
-        # Copied from analyze_registrations_count.py
-        self.product_pattern = re.compile(
-            r'(.*?)\s*\(Amount:\s*([\d\.]+).*?, Quantity:\s*(\d+)(?:, Registration Type:\s*([^,)]+))?.*?\)'
-        )
+        self.product_pattern = PRODUCT_PATTERN
 
     def test_parsing_cases(self):
         test_cases = [
@@ -36,7 +34,15 @@ class TestRegistrationParsing(unittest.TestCase):
 
             # Test 25.00
             ("WACYPAA 27 Registration (Amount: 25.00 USD, Quantity: 1)",
-             "WACYPAA 27 Registration", 25, 1, "Unspecified")
+             "WACYPAA 27 Registration", 25, 1, "Unspecified"),
+
+            # Parentheses inside the product name
+            ("Shirt (Large) (Amount: 15.00 USD, Quantity: 2)",
+             "Shirt (Large)", 15, 2, "Unspecified"),
+
+            # Registration Type followed by more fields
+            ("Late Registration (Amount: 50.00 USD, Quantity: 1, Registration Type: Late, Code: X)",
+             "Late Registration", 50, 1, "Late")
         ]
         
         for input_str, exp_name, exp_price, exp_qty, exp_type in test_cases:
@@ -64,5 +70,35 @@ class TestRegistrationParsing(unittest.TestCase):
                 self.assertEqual(qty, exp_qty)
                 self.assertEqual(reg_type, exp_type)
 
+    def test_multiline_cell(self):
+        cell = ("WACYPAA 27 Registration (Amount: 20.00 USD, Quantity: 1)\n"
+                "  Merch (Amount: 12.50 USD, Quantity: 2)\r\n"
+                "Total: 45.00 USD (Amount: 45.00 USD, Quantity: 1)\n"
+                "Transaction ID: abc123\n"
+                "Broken (Amount: 5.00 USD\n"
+                "Quantity: 1)")
+        names = [m.group(1).strip() for m in self.product_pattern.finditer(cell)]
+        self.assertEqual(names, ["WACYPAA 27 Registration", "Merch"])
+
+    def test_unmatched_line_fails_fast(self):
+        # No closing parenthesis: the old lazy pattern backtracked badly here
+        line = "Registration (Amount: 20.00 USD" + ", Quantity: 1" * 2000
+        self.assertIsNone(self.product_pattern.search(line))
+
+class TestProductTally(unittest.TestCase):
+    def test_tally_products(self):
+        line = "WACYPAA 27 Registration (Amount: 20.00 USD, Quantity: 1)"
+        rows = [
+            ["a", line + "\nTotal: 20.00 USD"],
+            [],
+            ["b", line],
+            ["c", "no products here"],
+            ["d"],
+        ]
+        total_rows, rows_without_matches, product_counts = tally_products(rows, 1)
+        self.assertEqual(total_rows, 4)
+        self.assertEqual(rows_without_matches, 1)
+        self.assertEqual(product_counts, {line: 2})
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import column_similarity_analyzer
+from column_similarity_analyzer import (
+    PARALLEL_MIN_VALUES,
+    cluster_similar_values,
+    levenshtein_distance,
+    levenshtein_similarity
+)
+
+class TestSimilarityGrouping(unittest.TestCase):
+    def test_transitive_values_share_a_cluster(self):
+        # 'abcdef' ~ 'abcdxy' ~ 'abwxyz' at cutoff 0.6, but the two ends
+        # are not similar to each other directly
+        values = ['abcdef', 'abcdxy', 'abwxyz', 'zzzzzz']
+        clusters = cluster_similar_values(values, 0.6)
+        self.assertEqual(sorted(clusters), [[0, 1, 2], [3]])
+
+    def test_clusters_are_sorted_by_index(self):
+        values = ['no', 'vegan', 'vgan', 'yes', 'vegann']
+        clusters = cluster_similar_values(values, 0.8)
+        self.assertIn([1, 2, 4], clusters)
+        for cluster in clusters:
+            self.assertEqual(cluster, sorted(cluster))
+
+    def test_levenshtein_metric(self):
+        values = ['vegetarian', 'vegitarian', 'vegan']
+        clusters = cluster_similar_values(values, 0.8, metric='levenshtein')
+        self.assertEqual(sorted(clusters), [[0, 1], [2]])
+
+    def test_levenshtein_length_band_boundary(self):
+        # Similarity is exactly the cutoff (1 - 11/25 = 0.56), which the
+        # length pruning must not cut off
+        values = ['x' * 14, 'x' * 25]
+        self.assertEqual(levenshtein_similarity(*values), 0.56)
+        self.assertEqual(cluster_similar_values(values, 0.56, metric='levenshtein'), [[0, 1]])
+        self.assertEqual(cluster_similar_values(['x' * 7, 'x' * 25], 0.28, metric='levenshtein'), [[0, 1]])
+
+    def test_levenshtein_empty_values(self):
+        clusters = cluster_similar_values(['', ''], 0.8, metric='levenshtein')
+        self.assertEqual(clusters, [[0, 1]])
+
+    def test_parallel_matches_serial(self):
+        values = [f"value {n % 97} {n % 13}" for n in range(PARALLEL_MIN_VALUES)]
+        serial = cluster_similar_values(values, 0.9)
+        parallel = cluster_similar_values(values, 0.9, jobs=2)
+        self.assertEqual(sorted(serial), sorted(parallel))
+
+    def test_parallel_clustered_values(self):
+        # Heavily clustered column: a handful of near-duplicate families
+        values = [f"vegetarian option {n % 7}{'x' * (n % 3)}" for n in range(PARALLEL_MIN_VALUES)]
+        serial = cluster_similar_values(values, 0.8)
+        parallel = cluster_similar_values(values, 0.8, jobs=2)
+        self.assertEqual(sorted(serial), sorted(parallel))
+
+        # A worker only reports the pairs that joined two clusters
+        column_similarity_analyzer._init_pair_worker(values, 0.8, 'ratio')
+        links = column_similarity_analyzer._link_chunk(range(0, len(values), 8))
+        self.assertLess(len(links), len(values))
+
+class TestLevenshtein(unittest.TestCase):
+    def test_distance(self):
+        cases = [
+            ("", "", 0),
+            ("", "abc", 3),
+            ("kitten", "sitting", 3),
+            ("flaw", "lawn", 2),
+            ("gluten free", "gluten-free", 1),
+            # Longer than 64 characters, past a single machine word
+            ("a" * 70 + "b", "a" * 70 + "c", 1),
+        ]
+        for a, b, expected in cases:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(levenshtein_distance(a, b), expected)
+                self.assertEqual(levenshtein_distance(b, a), expected)
+
+    def test_similarity(self):
+        self.assertEqual(levenshtein_similarity("", ""), 1.0)
+        self.assertAlmostEqual(levenshtein_similarity("vegan", "vgan"), 0.8)
+
+if __name__ == "__main__":
+    unittest.main()
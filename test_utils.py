@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from utils import detect_csv_encoding, read_csv_headers
+
+class TestEncodingDetection(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_file(self, name, data):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    def test_detect_csv_encoding(self):
+        rows = "Name,Committee\nJosé,WACYPAA\n"
+        # cp1252-only bytes (a curly quote) past the first READ_BUFFER_SIZE chunk
+        late_cp1252 = ("Name,Committee\n" + "Sam,WACYPAA\n" * 100000).encode('ascii') + b"Jo\x92s,SCYPAA\n"
+        test_cases = [
+            # Plain utf-8 is read with utf-8-sig, which also accepts it
+            ("utf8.csv", rows.encode('utf-8'), 'utf-8-sig'),
+            ("utf8_bom.csv", rows.encode('utf-8-sig'), 'utf-8-sig'),
+            ("utf16.csv", rows.encode('utf-16'), 'utf-16'),
+            ("cp1252.csv", rows.encode('cp1252'), 'cp1252'),
+            ("late_cp1252.csv", late_cp1252, 'cp1252'),
+            # 0x81 is undefined in cp1252, so only latin-1 accepts it
+            ("latin1.csv", b"Name\nA\x81B\n", 'latin-1'),
+        ]
+
+        for name, data, expected in test_cases:
+            with self.subTest(name=name):
+                self.assertEqual(detect_csv_encoding(self.write_file(name, data)), expected)
+
+    def test_read_csv_headers(self):
+        path = self.write_file("utf16.csv", "Name,Committee\nJosé,WACYPAA\n".encode('utf-16'))
+        self.assertEqual(read_csv_headers(path), (['Name', 'Committee'], 'utf-16'))
+
+    def test_empty_file_has_no_headers(self):
+        path = self.write_file("empty.csv", b"")
+        self.assertEqual(read_csv_headers(path), (None, 'utf-8-sig'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,46 @@
 """
 Shared utilities for CSV analysis tools.
 """
+import codecs
 import csv
-import glob
+import functools
+import os
 import argparse
 
 
+@functools.lru_cache(maxsize=1)
+def list_csv_files():
+    """
+    Lists the CSV files in the current directory, sorted by name.
+    The result is cached for the session; call clear_csv_file_cache() if
+    files may have been added or removed since.
+    
+    Returns:
+        Tuple of filenames
+    """
+    # os.scandir avoids glob's pattern matching and a stat() per entry
+    with os.scandir('.') as entries:
+        return tuple(sorted(
+            entry.name for entry in entries
+            if entry.name.endswith('.csv')
+            and not entry.name.startswith('.')
+            and entry.is_file()
+        ))
+
+
+def clear_csv_file_cache():
+    """
+    Forgets the cached directory listing used by list_csv_files().
+    """
+    list_csv_files.cache_clear()
+
+
 def select_file_interactive():
     """
     Interactively prompts the user to select a CSV file from the current directory.
     Returns the selected filename or None if no files found.
     """
-    csv_files = glob.glob('*.csv')
+    csv_files = list_csv_files()
     if not csv_files:
         print("No CSV files found in the current directory.")
         return None
@@ -47,8 +76,16 @@ def select_column_interactive(headers, column_name=None, default_index=None, pro
     Returns:
         The selected column name
     """
+    # Lookup tables built once, instead of scanning headers per attempt;
+    # the first header wins when several strip to the same name
+    header_set = set(headers)
+    by_stripped = {}
+    for col in headers:
+        by_stripped.setdefault(col.strip(), col)
+    num_headers = len(headers)
+
     # If column_name provided and exists, use it
-    if column_name and column_name in headers:
+    if column_name and column_name in header_set:
         return column_name
     
     if column_name:
@@ -59,7 +96,7 @@ def select_column_interactive(headers, column_name=None, default_index=None, pro
         print(f"{idx + 1}. {col}")
 
     default_msg = ""
-    if default_index is not None and 0 <= default_index < len(headers):
+    if default_index is not None and 0 <= default_index < num_headers:
         default_msg = f" (default {default_index + 1})"
 
     while True:
@@ -67,61 +104,146 @@ def select_column_interactive(headers, column_name=None, default_index=None, pro
         
         # Handle default
         if not col_input:
-            if default_index is not None and 0 <= default_index < len(headers):
+            if default_index is not None and 0 <= default_index < num_headers:
                 return headers[default_index]
             continue
 
         # Try parsing as integer index
         if col_input.isdigit():
             idx = int(col_input) - 1
-            if 0 <= idx < len(headers):
+            if 0 <= idx < num_headers:
                 return headers[idx]
             else:
-                print(f"Number must be between 1 and {len(headers)}.")
+                print(f"Number must be between 1 and {num_headers}.")
                 continue
         
         # Try matching column name
-        for col in headers:
-            if col.strip() == col_input:
-                return col
+        if col_input in by_stripped:
+            return by_stripped[col_input]
         
         print("Column name not found or invalid number. Please try again.")
 
 
-def read_csv_with_fallback_encoding(filepath, use_dictreader=True):
+CSV_ENCODINGS = ['utf-8-sig', 'utf-8', 'cp1252', 'latin-1']
+
+# Buffer size for streaming reads; the 8 KB default means many more syscalls
+# on large exports
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Byte order marks that pin down the encoding before any fallback is tried
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def _file_decodes_as(filepath, encoding):
     """
-    Reads a CSV file with encoding fallback (tries utf-8-sig, then cp1252).
+    Checks whether a file's raw bytes decode cleanly with the given encoding.
+    Stops at the first undecodable chunk, so a wrong guess is usually
+    rejected after reading only the start of the file.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(filepath, mode='rb') as fh:
+            for chunk in iter(lambda: fh.read(READ_BUFFER_SIZE), b''):
+                decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_csv_encoding(filepath):
+    """
+    Picks the encoding to read a CSV file with.
+    A byte order mark decides it directly; otherwise the first encoding in
+    CSV_ENCODINGS whose decoder accepts the file's bytes is used, ending with
+    latin-1, which accepts any bytes. Files are only ever decoded, never
+    CSV-parsed, while guessing.
     
     Args:
         filepath: Path to the CSV file
-        use_dictreader: If True, returns (headers, rows) using DictReader
-                       If False, returns (header_list, row_lists) using reader
     
     Returns:
-        Tuple of (headers, rows)
+        The encoding name
+    
+    Raises:
+        FileNotFoundError: If file doesn't exist
+    """
+    with open(filepath, mode='rb') as fh:
+        head = fh.read(4)
+
+    candidates = list(CSV_ENCODINGS)
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            candidates.insert(0, encoding)
+            break
+
+    for encoding in candidates:
+        if encoding == 'latin-1':
+            # Every byte sequence is valid latin-1
+            return encoding
+        if encoding == 'utf-8' and 'utf-8-sig' in candidates:
+            # utf-8-sig already covered plain utf-8
+            continue
+        if _file_decodes_as(filepath, encoding):
+            return encoding
+
+
+def read_csv_headers(filepath):
+    """
+    Reads the header row of a CSV file, detecting its encoding.
+    
+    Args:
+        filepath: Path to the CSV file
+    
+    Returns:
+        Tuple of (headers, encoding); headers is None for an empty file
     
     Raises:
         FileNotFoundError: If file doesn't exist
         csv.Error: If CSV parsing fails
     """
-    encodings = ['utf-8-sig', 'utf-8', 'cp1252', 'latin-1']
+    encoding = detect_csv_encoding(filepath)
+    with open(filepath, mode='r', newline='', encoding=encoding) as csvfile:
+        headers = next(csv.reader(csvfile), None)
+    return headers, encoding
+
+
+def iter_csv_rows(filepath, encoding, use_dictreader=False):
+    """
+    Streams the data rows of a CSV file (everything after the header row).
     
-    for encoding in encodings:
-        try:
-            with open(filepath, mode='r', newline='', encoding=encoding) as csvfile:
-                if use_dictreader:
-                    reader = csv.DictReader(csvfile)
-                    headers = reader.fieldnames
-                    rows = list(reader)
-                else:
-                    reader = csv.reader(csvfile)
-                    headers = next(reader)
-                    rows = list(reader)
-                return headers, rows
-        except UnicodeDecodeError:
-            continue
+    Args:
+        filepath: Path to the CSV file
+        encoding: Encoding to open the file with (see read_csv_headers)
+        use_dictreader: If True, yields dicts keyed by header and skips blank
+                       lines; unlike DictReader, cells past the header are
+                       dropped and missing cells are left out rather than
+                       set to None. If False, yields row lists
+    
+    Yields:
+        One row at a time
     
-    raise UnicodeDecodeError(f"Could not decode file with any of: {encodings}")
+    Raises:
+        csv.Error: If CSV parsing fails
+    """
+    with open(filepath, mode='r', newline='', encoding=encoding,
+              buffering=READ_BUFFER_SIZE) as csvfile:
+        reader = csv.reader(csvfile)
+        headers = next(reader, None)
+        if headers is None:
+            return
+        if use_dictreader:
+            # csv.DictReader builds each row in Python; split rows with
+            # the C reader instead and zip them onto the headers.
+            for row in reader:
+                if row:
+                    yield dict(zip(headers, row))
+        else:
+            yield from reader
 
 
 def create_base_argparser(description):
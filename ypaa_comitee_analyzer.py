@@ -3,12 +3,17 @@
 Normalizes and counts YPAA committee names from survey or registration data.
 """
 import csv
+import functools
+import operator
 import re
+import string
+import sys
 from collections import Counter
 from utils import (
     select_file_interactive,
     select_column_interactive,
-    read_csv_with_fallback_encoding,
+    read_csv_headers,
+    iter_csv_rows,
     create_base_argparser
 )
 
@@ -38,6 +43,8 @@ YPAA_NORMALIZATION = {
     'BACY': 'BACYPAA',
     'TITY': 'TITYPAA',
 }
+# Canonical names become Counter keys; intern them (see NOT_SPECIFIED_GROUP)
+YPAA_NORMALIZATION = {typo: sys.intern(name) for typo, name in YPAA_NORMALIZATION.items()}
 
 # Standardized "No" responses
 NO_RESPONSES = frozenset({
@@ -52,72 +59,161 @@ YES_RESPONSES = frozenset({
     'yes', 'why yes i am', 'yes .', 'yea', 'yes!'
 })
 
+# Catch-all group names. Interned, like the YPAA names extract_groups
+# returns, so the Counter keys they end up as compare by identity.
+NOT_SPECIFIED_GROUP = sys.intern('Not Specified / Not a YPAA')
+YES_UNSPECIFIED_GROUP = sys.intern('Yes, Unspecified Group')
+HOST_ADVISORY_GROUP = sys.intern('Host / Advisory (Unspecified YPAA)')
 
-def normalize_ypaa_name(name):
+# Shared results for blank/"no" and unspecified "yes" answers
+NOT_SPECIFIED_RESULT = (NOT_SPECIFIED_GROUP,)
+YES_UNSPECIFIED_RESULT = (YES_UNSPECIFIED_GROUP,)
+
+# Separators between several groups in one answer: /, &, comma, ' and '.
+# Surrounding whitespace is part of the separator, so split parts of a
+# stripped answer come out stripped too.
+SPLIT_PATTERN = re.compile(r'\s*(?:[/,&]|\s+and\s+)\s*')
+
+# Any known variation/typo, longest first so e.g. "SWAC" wins over "WAC"
+# (matched against uppercased text, like YPAA_PATTERN)
+TYPO_PATTERN = re.compile(
+    '|'.join(re.escape(typo) for typo in sorted(YPAA_NORMALIZATION, key=len, reverse=True))
+)
+
+# A word ending in YPAA, e.g. "WACYPAA" (matched against uppercased text)
+YPAA_PATTERN = re.compile(r'\b([A-Z]*YPAA)\b')
+
+# Product line: "Product Name (Amount: XX.XX USD, Quantity: N, ...)"
+# Run over a whole products cell with findall: ^ anchors one product per line,
+# "Total:" / "Transaction ID:" summary lines are skipped, and [^\S\n] keeps
+# whitespace matching on the same line. Yields (name, quantity) pairs.
+PRODUCT_PATTERN = re.compile(
+    r'^(?![^\S\n]*(?:Total:|Transaction ID:))(.*?)[^\S\n]*\(Amount:.*?, Quantity:[^\S\n]*(\d+)'
+    r'(?:, Registration Type:.*?)?.*?\)',
+    re.MULTILINE
+)
+
+
+# Uppercases ASCII letters only and leaves other characters alone
+ASCII_UPPERCASE = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+
+def _upper_ascii(text):
     """
-    Normalize a YPAA name using the normalization map.
+    Uppercases text for the case-sensitive patterns above. str.upper() can
+    rewrite non-ASCII characters ('ß' becomes 'SS'), which would let them
+    join a YPAA name, so only ASCII letters are changed in such text.
     """
-    upper_name = name.upper()
-    return YPAA_NORMALIZATION.get(upper_name, upper_name)
+    if text.isascii():
+        return text.upper()
+    return text.translate(ASCII_UPPERCASE)
 
 
+@functools.lru_cache(maxsize=None)
 def extract_groups(name):
     """
-    Extracts a list of standardized committee/group names from a string.
+    Extracts standardized committee/group names from a string.
     Handles multiple groups (separated by /, &, and, ,) and typos.
+    Results are cached per input string without a size limit: survey answers
+    repeat a lot, so the distinct ones are few.
     
     Returns:
-        List of unique group names found
+        Tuple of unique group names found
     """
-    if not name or not name.strip():
-        return ['Not Specified / Not a YPAA']
+    if not name:
+        return NOT_SPECIFIED_RESULT
+    stripped = name.strip()
+    if not stripped:
+        return NOT_SPECIFIED_RESULT
         
-    name_lower = name.strip().lower()
+    name_lower = stripped.lower()
 
     if name_lower in NO_RESPONSES:
-        return ['Not Specified / Not a YPAA']
+        return NOT_SPECIFIED_RESULT
 
     if name_lower in YES_RESPONSES:
-        return ['Yes, Unspecified Group']
+        return YES_UNSPECIFIED_RESULT
+
+    name_upper = _upper_ascii(stripped)
 
-    # Split by common separators: /, &, comma, ' and '
-    parts = re.split(r'[/,&]|\s+and\s+', name)
+    # A bare name such as "wacypaa" is its own single group: the YPAA regex
+    # would match the whole word anyway
+    if name_upper.endswith('YPAA') and stripped.isascii() and stripped.isalpha():
+        return (YPAA_NORMALIZATION.get(name_upper) or sys.intern(name_upper),)
+
+    # Checked once for the whole answer; parts only repeat the check if it hits
+    mentions_role = 'HOST' in name_upper or 'ADVISORY' in name_upper
+
+    # Answers without any YPAA name, known typo or host/advisory mention
+    # (e.g. "just an AA member") can't yield a group, so skip splitting them
+    if ('YPAA' not in name_upper and not mentions_role
+            and not TYPO_PATTERN.search(name_upper)):
+        parts = ()
+    elif ('/' not in stripped and ',' not in stripped and '&' not in stripped
+            and 'and' not in stripped):
+        # A single answer (the common case): no separator to split on
+        parts = (stripped,)
+    else:
+        # Split by common separators: /, &, comma, ' and '
+        parts = SPLIT_PATTERN.split(stripped)
     
     found_groups = []
     
     for part in parts:
-        part = part.strip()
         if not part:
             continue
             
-        part_lower = part.lower()
+        # Every check below is case-sensitive against this one uppercased
+        # copy, which is cheaper than re.IGNORECASE or extra lowercasing
+        part_upper = _upper_ascii(part)
         
-        # Try regex for YPAA pattern first
-        match = re.search(r'\b([a-zA-Z]*YPAA)\b', part, re.IGNORECASE)
+        # Try regex for YPAA pattern first, if the part can match it at all
+        match = YPAA_PATTERN.search(part_upper) if 'YPAA' in part_upper else None
         if match:
-            found_name = normalize_ypaa_name(match.group(1))
-            found_groups.append(found_name)
-            continue
-            
-        # Check typos map if regex failed
-        for typo, correction in YPAA_NORMALIZATION.items():
-            if typo.lower() in part_lower:
-                found_groups.append(correction)
-                break
+            found_name = match.group(1)
+            group = YPAA_NORMALIZATION.get(found_name) or sys.intern(found_name)
         else:
+            # Check typos map if regex failed (one scan for all variations)
+            match = TYPO_PATTERN.search(part_upper)
+            if match:
+                group = YPAA_NORMALIZATION[match.group(0)]
             # If no YPAA found, check for Host/Advisory role
-            if 'host' in part_lower or 'advisory' in part_lower:
-                found_groups.append('Host / Advisory (Unspecified YPAA)')
+            elif mentions_role and ('HOST' in part_upper or 'ADVISORY' in part_upper):
+                group = HOST_ADVISORY_GROUP
+            else:
+                continue
+
+        # Keep groups unique, preserving order; a membership test on the
+        # usual one or two groups is cheaper than deduplicating afterwards
+        if group not in found_groups:
+            found_groups.append(group)
                 
     if found_groups:
-        # Return unique groups, preserving order
-        return list(dict.fromkeys(found_groups))
+        return tuple(found_groups)
         
     # Fallback: check if contains "yes"
     if 'yes' in name_lower:
-        return ['Yes, Unspecified Group']
+        return YES_UNSPECIFIED_RESULT
          
-    return [name.strip().title()]
+    return (stripped.title(),)
+
+
+def count_registrations(products_cell):
+    """
+    Sums the quantities of the registration products in a products cell.
+    
+    Returns:
+        Total registration quantity (0 if there are none)
+    """
+    # Substring check first: most cells hold no registration at all
+    if 'Registration' not in products_cell:
+        return 0
+
+    reg_count = 0
+    for p_name, p_qty in PRODUCT_PATTERN.findall(products_cell):
+        if "Registration" in p_name:
+            reg_count += int(p_qty)
+    return reg_count
 
 
 def main():
@@ -148,7 +244,7 @@ def main():
     print(f"\nLoading {file_path}...")
     
     try:
-        headers, rows = read_csv_with_fallback_encoding(file_path, use_dictreader=False)
+        headers, encoding = read_csv_headers(file_path)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         return
@@ -159,6 +255,10 @@ def main():
         print(f"Error: CSV parsing failed - {e}")
         return
 
+    if not headers:
+        print("Error: CSV file seems valid but has no headers.")
+        return
+
     # Select committee column
     column_name = select_column_interactive(
         headers, 
@@ -193,93 +293,85 @@ def main():
     products_index = headers.index(products_col)
     print(f"Using Products Column: '{products_col}'")
 
-    # Regex for product parsing
-    product_pattern = re.compile(
-        r'(.*?)\s*\(Amount:.*?, Quantity:\s*(\d+)(?:, Registration Type:\s*(.*?))?.*?\)'
-    )
-
-    all_groups = []
+    # Registration weight per raw committee answer; answers repeat a lot, so
+    # they are expanded into groups once each after the loop
+    committee_weights = Counter()
     total_registrations_processed = 0
 
-    for row in rows:
-        # 1. Determine Registration Count for this row
-        reg_count = 0
-        if len(row) > products_index:
-            prod_cell = row[products_index]
-            if prod_cell:
-                lines = prod_cell.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if not line or line.startswith("Total:") or line.startswith("Transaction ID:"):
-                        continue
-                    
-                    match = product_pattern.search(line)
-                    if match:
-                        p_name = match.group(1).strip()
-                        p_qty = int(match.group(2))
-                        
-                        if "Registration" in p_name:
-                            reg_count += p_qty
-        
-        # Skip rows with no registrations
-        if reg_count == 0:
-            continue
+    # Short rows are padded with blanks up to this width, so the loop can
+    # index both columns without bounds checks. A blank products cell has no
+    # registrations and a blank committee cell counts as 'Not Specified'.
+    min_len = max(column_index, products_index) + 1
+    # Only these two cells of each row are used; fetch both in one C call
+    get_cells = operator.itemgetter(products_index, column_index)
 
-        total_registrations_processed += reg_count
+    # Rows are streamed, so count them as they go by
+    total_rows = 0
+    try:
+        for row in iter_csv_rows(file_path, encoding):
+            total_rows += 1
+            if len(row) < min_len:
+                row += [''] * (min_len - len(row))
 
-        # 2. Extract Committees
-        if len(row) > column_index:
-            val = row[column_index]
-            groups = extract_groups(val)
-            
-            # Add to master list reg_count times (weighted)
-            for _ in range(reg_count):
-                all_groups.extend(groups)
-        else:
-            # Row exists but no committee column data
-            for _ in range(reg_count):
-                all_groups.append('Not Specified / Not a YPAA')
+            # 1. Determine Registration Count for this row
+            prod_cell, committee_cell = get_cells(row)
+            reg_count = count_registrations(prod_cell)
+
+            # Skip rows with no registrations
+            if reg_count == 0:
+                continue
+
+            total_registrations_processed += reg_count
+
+            committee_weights[committee_cell] += reg_count
+    except csv.Error as e:
+        print(f"Error: CSV parsing failed - {e}")
+        return
+
+    # 2. Extract Committees, weighted by registration count
+    group_counts = Counter()
+    for committee_cell, weight in committee_weights.items():
+        for group in extract_groups(committee_cell):
+            group_counts[group] += weight
 
-    # Calculate counts
-    group_counts = Counter(all_groups)
     threshold = args.threshold
     
-    filtered_items = []
-    dissimilar_sum = 0
-    no_specified_sum = 0
-    yes_unspecified_sum = 0
-    total_mentions_weighted = 0
-    
-    for group, count in group_counts.items():
-        total_mentions_weighted += count
-        
-        if group == 'Not Specified / Not a YPAA':
-            no_specified_sum += count
-        elif group == 'Yes, Unspecified Group':
-            yes_unspecified_sum += count
-        elif count == 1:
-            dissimilar_sum += count
-        elif count >= threshold:
-            filtered_items.append((group, count))
+    # The two special groups come straight out of the dict; everything left
+    # is a named group. One-off entries never make the table, whatever the
+    # threshold.
+    no_specified_sum = group_counts.pop(NOT_SPECIFIED_GROUP, 0)
+    yes_unspecified_sum = group_counts.pop(YES_UNSPECIFIED_GROUP, 0)
+    dissimilar_sum = sum(count for count in group_counts.values() if count == 1)
+    filtered_items = [
+        (group, count) for group, count in group_counts.items()
+        if count != 1 and count >= threshold
+    ]
             
     # Sort descending
     filtered_items.sort(key=lambda x: x[1], reverse=True)
     
-    print(f"\n--- Filtered Group Mentions (Weighted by Registration Count >= {threshold}) ---")
-    print(f"{'YPAA Group / Conference':<40} | {'Weighted Count'}")
-    print("-" * 60)
+    # Build the table and summary and write them in one call rather than one
+    # print per line
+    report = [
+        f"\n--- Filtered Group Mentions (Weighted by Registration Count >= {threshold}) ---",
+        f"{'YPAA Group / Conference':<40} | {'Weighted Count'}",
+        "-" * 60,
+    ]
     filtered_count_sum = 0
     for group, count in filtered_items:
-        print(f"{group:<40} | {count}")
+        report.append(f"{group:<40} | {count}")
         filtered_count_sum += count
         
-    print("\n--- Summary ---")
-    print(f"Total Rows Processed: {len(rows)}")
-    print(f"Total Registered Attendees Counted: {total_registrations_processed}")
-    print(f"Weighted Mentions Grouped by a YPAA/Conference: {filtered_count_sum}")
-    print(f"Weighted Mentions indicating a 'Yes' but no specific YPAA: {yes_unspecified_sum}")
-    print(f"Weighted Mentions indicating 'No' or blank: {no_specified_sum}")
-    print(f"Weighted Mentions that were 'Very Dissimilar' (One-off entries): {dissimilar_sum}")
+    report += [
+        "\n--- Summary ---",
+        f"Total Rows Processed: {total_rows}",
+        f"Total Registered Attendees Counted: {total_registrations_processed}",
+        f"Weighted Mentions Grouped by a YPAA/Conference: {filtered_count_sum}",
+        f"Weighted Mentions indicating a 'Yes' but no specific YPAA: {yes_unspecified_sum}",
+        f"Weighted Mentions indicating 'No' or blank: {no_specified_sum}",
+        f"Weighted Mentions that were 'Very Dissimilar' (One-off entries): {dissimilar_sum}",
+    ]
+    sys.stdout.write("\n".join(report) + "\n")
 
 
 if __name__ == "__main__":